@@ -1,9 +1,10 @@
-import whisper
-from datetime import timedelta
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+import ctranslate2
 import os
 import sys
 import re
 import argparse
+from functools import lru_cache
 
 DEFAULTS = {
     "input": "input/video2.MOV",
@@ -14,6 +15,10 @@ DEFAULTS = {
     "max_len": 40,
 }
 
+# Zero-padded lookup tables used by format_time
+_TWO_DIGITS = [f"{i:02}" for i in range(100)]
+_THREE_DIGITS = [f"{i:03}" for i in range(1000)]
+
 def ask(prompt: str, default, cast=str):
     value = input(f"{prompt} [{default}]: ").strip()
     if value == "":
@@ -25,9 +30,23 @@ def ask(prompt: str, default, cast=str):
         return default
 
 
-def parse_args():
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {number}")
+    return number
+
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(
-        description="Generate SRT subtitles using OpenAI Whisper"
+        description="Generate SRT subtitles using Whisper (faster-whisper)"
     )
 
     parser.add_argument("--input", help="Path to input video file")
@@ -36,6 +55,29 @@ def parse_args():
     parser.add_argument("--language", help="Language code (e.g., en, pl, es)")
     parser.add_argument("--pause", type=float, help="Max pause between words in seconds")
     parser.add_argument("--max-len", type=int, help="Max characters per subtitle line")
+    parser.add_argument(
+        "--device",
+        choices=["auto", "cpu", "cuda"],
+        default="auto",
+        help="Inference device (auto uses CUDA when a GPU is available)"
+    )
+    parser.add_argument(
+        "--compute-type",
+        choices=["float16", "int8", "int8_float16", "float32"],
+        help="CTranslate2 compute type (default: int8 on CPU, int8_float16 on CUDA)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=positive_int,
+        help="Number of audio chunks decoded in parallel "
+             "(default: 8 on CUDA, 1 on CPU; 1 disables batching)"
+    )
+    parser.add_argument(
+        "--threads",
+        type=non_negative_int,
+        default=0,
+        help="CPU threads used for inference (default: 0, CTranslate2's own default)"
+    )
 
     parser.add_argument(
         "--interactive",
@@ -43,7 +85,7 @@ def parse_args():
         help="Ask for missing parameters interactively"
     )
 
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def split_sentences(text: str, max_len=45):
@@ -70,15 +112,20 @@ def split_sentences(text: str, max_len=45):
 
 
 def format_time(seconds: float) -> str:
-    td = timedelta(seconds=seconds)
-    total_seconds = int(td.total_seconds())
-    millis = int((seconds - total_seconds) * 1000)
-
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    seconds = total_seconds % 60
-
-    return f"{hours:02}:{minutes:02}:{seconds:02},{millis:03}"
+    # Round to whole milliseconds once (clamping FP noise below zero), then
+    # split with integer divmods
+    total_ms = max(0, int(seconds * 1000 + 0.5))
+    hours, rem = divmod(total_ms, 3_600_000)
+    minutes, rem = divmod(rem, 60_000)
+    secs, millis = divmod(rem, 1000)
+
+    if hours >= 100:
+        return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+
+    return (
+        _TWO_DIGITS[hours] + ":" + _TWO_DIGITS[minutes] + ":"
+        + _TWO_DIGITS[secs] + "," + _THREE_DIGITS[millis]
+    )
 
 
 def validate_input(path: str) -> None:
@@ -93,35 +140,58 @@ def validate_input(path: str) -> None:
 
 
 def build_subtitles_from_words(words, pause=0.4, max_len=40):
-    subs = []
-    current_words = []
-    start_time = words[0]["start"]
+    current_texts = []
+    text_len = 0  # len(" ".join(current_texts)), kept up to date incrementally
+    start_time = words[0].start
+    end_time = start_time
+
+    for w in words:
+        word_start, word_end, text = w.start, w.end, w.word
 
-    for i, w in enumerate(words):
-        if current_words:
-            gap = w["start"] - current_words[-1]["end"]
+        if current_texts:
+            gap = word_start - end_time
         else:
             gap = 0
 
-        text_len = len(" ".join(x["word"] for x in current_words))
-
         if gap > pause or text_len > max_len:
-            end_time = current_words[-1]["end"]
-            subs.append((start_time, end_time, " ".join(x["word"] for x in current_words)))
-            current_words = []
-            start_time = w["start"]
+            yield start_time, end_time, " ".join(current_texts)
+            current_texts = []
+            text_len = 0
+            start_time = word_start
+
+        text_len += len(text) + (1 if current_texts else 0)
+        current_texts.append(text)
+        end_time = word_end
+
+    if current_texts:
+        yield start_time, end_time, " ".join(current_texts)
 
-        current_words.append(w)
 
-    if current_words:
-        subs.append((start_time, current_words[-1]["end"], " ".join(x["word"] for x in current_words)))
+def detect_device(requested: str = "auto") -> str:
+    cuda_available = ctranslate2.get_cuda_device_count() > 0
 
-    return subs
+    if requested == "cuda" and not cuda_available:
+        print("CUDA requested but no GPU was found, falling back to CPU.")
+        return "cpu"
 
+    if requested == "auto":
+        return "cuda" if cuda_available else "cpu"
 
-def main():
-    args = parse_args()
+    return requested
 
+
+@lru_cache(maxsize=2)
+def get_model(name: str, device: str, compute_type: str, cpu_threads: int = 0) -> WhisperModel:
+    # Reuse loaded weights when transcribing several files in one process
+    return WhisperModel(
+        name,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads
+    )
+
+
+def run(args) -> None:
     if args.interactive:
         args.input = args.input or ask(
             "Path to video file", DEFAULTS["input"]
@@ -160,38 +230,69 @@ def main():
     if output_dir:
         os.makedirs(output_dir, exist_ok=True)
 
-    print(f"Loading model: {args.model}...")
-    model = whisper.load_model(args.model)
+    device = detect_device(args.device)
+    # int8 on CPU; int8 weights with float16 activations on GPU
+    # (CTranslate2 quantizes weights on load)
+    compute_type = args.compute_type or (
+        "int8" if device == "cpu" else "int8_float16"
+    )
+
+    print(f"Loading model: {args.model} ({device}, {compute_type})...")
+    model = get_model(args.model, device, compute_type, args.threads)
     
     print(f"Transcribing file: {args.input}...")
-    result = model.transcribe(
-        args.input,
-        language=args.language,
-        word_timestamps=True
-    )
+    # The batched pipeline drops previous-text conditioning, so it is only
+    # enabled by default where it pays off (GPU)
+    batch_size = args.batch_size or (8 if device == "cuda" else 1)
+
+    if batch_size > 1:
+        # VAD splits the audio into ~30s chunks which are encoded/decoded as a batch
+        segments, info = BatchedInferencePipeline(model=model).transcribe(
+            args.input,
+            language=args.language,
+            word_timestamps=True,
+            vad_filter=True,
+            batch_size=batch_size
+        )
+    else:
+        segments, info = model.transcribe(
+            args.input,
+            language=args.language,
+            word_timestamps=True,
+            vad_filter=True
+        )
 
+    # Segments are produced lazily, so each one is written as soon as it is decoded
     with open(args.output, "w", encoding="utf-8") as f:
         index = 1
 
-        for segment in result["segments"]:
-            if "words" not in segment or not segment["words"]:
+        for segment in segments:
+            if not segment.words:
                 continue
 
-            subtitles = build_subtitles_from_words(
-                segment["words"],
+            entries = []
+            for start, end, text in build_subtitles_from_words(
+                segment.words,
                 pause=args.pause,
                 max_len=args.max_len
-            )
-
-            for start, end, text in subtitles:
-                f.write(f"{index}\n")
-                f.write(f"{format_time(start)} --> {format_time(end)}\n")
-                f.write(f"{text.strip()}\n\n")
+            ):
+                entries.append(
+                    f"{index}\n"
+                    f"{format_time(start)} --> {format_time(end)}\n"
+                    f"{text.strip()}\n\n"
+                )
                 index += 1
+
+            f.write("".join(entries))
+            f.flush()
     
     print(f"Done! Subtitles saved to: {args.output}")
 
 
+def main(args=None):
+    run(args if args is not None else parse_args())
+
+
 if __name__ == "__main__":
     main()
     
\ No newline at end of file